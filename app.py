@@ -41,7 +41,7 @@ from ui.components import (
     render_module_selector,
 )
 
-from steps import STEPS, get_step_by_id
+from steps import get_step_by_id
 
 
 def main():
@@ -13,54 +13,38 @@ from __future__ import annotations
 
 
 import uuid
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 import streamlit as st
 
 import time
 
 
-def safe_ai(step_id: str, prompt: str) -> str:
-    """
-    Safely call Gemini with caching and cooldown.
-    Avoids RPM flooding.
-    """
-    if "ai_cache" not in st.session_state:
-        st.session_state.ai_cache = {}
-    if "ai_last_call" not in st.session_state:
-        st.session_state.ai_last_call = 0.0
-
-    key = f"{step_id}:{prompt.strip()}"
-    cache = st.session_state.ai_cache
-
-    # 1. Cached response exists → return immediately
-    if key in cache:
-        return cache[key]
-
-    # 2. Simple rate-limit (max 10 calls/minute)
-    now = time.time()
-    if now - st.session_state.ai_last_call < 6:
-        return "AI cooling down to avoid API rate limits. Try again in a few seconds."
-
-    model = get_model()
-    response = model.generate_content(prompt).text
-    cache[key] = response
-    st.session_state.ai_last_call = now
-    return response
-
-
-
 def init_state() -> None:
     """Initialize all keys in ``st.session_state`` that the app relies on.
 
     This function should be called at the very beginning of the app.
     It sets up session storage, active step tracking, AI response cache,
     and timer metadata. If no sessions exist, a demo session is created.
+
+    The checks only need to run once per browser session; later reruns
+    return immediately after a single flag lookup.
     """
-  
+    if st.session_state.get("_state_initialized"):
+        return
+
     if "sessions" not in st.session_state:
         st.session_state["sessions"] = {}
 
+    if "session_order" not in st.session_state:
+        # Session ids, most recently created or updated first. Seed it from
+        # any sessions that already exist so none are missing from the list.
+        st.session_state["session_order"] = sorted(
+            st.session_state["sessions"],
+            key=lambda sid: st.session_state["sessions"][sid].get("updated_at", 0),
+            reverse=True,
+        )
+
     if "current_session_id" not in st.session_state:
         # Create an initial demo session so the UI has some data to
         # display on first load. Students can create a new session
@@ -76,10 +60,67 @@ def init_state() -> None:
         st.session_state["ai_responses"] = {}
 
     # Timer state keys. The time step handles updating these values.
+    # ``timer_base_ms`` is the time logged before the current run and
+    # ``timer_start_ms`` the monotonic reading when that run started, both
+    # in integer milliseconds.
     if "timer_running" not in st.session_state:
         st.session_state["timer_running"] = False
-    if "timer_start_ts" not in st.session_state:
-        st.session_state["timer_start_ts"] = None
+    if "timer_start_ms" not in st.session_state:
+        st.session_state["timer_start_ms"] = None
+    if "timer_base_ms" not in st.session_state:
+        minutes = float(get_current_session().get("total_time_minutes", 0) or 0)
+        st.session_state["timer_base_ms"] = round(minutes * 60_000)
+
+    st.session_state["_state_initialized"] = True
+
+
+def _blank_session_fields() -> Dict[str, Any]:
+    """Return the per-session SRL fields with their empty values.
+
+    A function rather than a constant so every session gets its own
+    lists and reflections dict instead of sharing mutable defaults.
+    """
+    return {
+        "task_name": "",
+        "task_type": "",
+        "goal_type": "mastery",
+        "goal_description": "",
+        "deadline": "",
+        "requirements": "",
+        "subtasks": "",
+        "prior_knowledge": "",
+        "knowledge_gaps": "",
+        "anticipated_challenges": "",
+        "contingency_plan": "",
+        "chosen_strategies": [],
+        "session_plan": "",
+        "recent_sessions": [],
+        "resources": [],
+        "reflections": {
+            "goal": "",
+            "strategies": "",
+            "time": "",
+            "growth": "",
+        },
+        "total_time_minutes": 0,
+    }
+
+
+# Example values layered over the blank fields for the first-run demo
+_DEMO_SESSION_FIELDS: Dict[str, Any] = {
+    "name": "Research paper on climate change",
+    "task_name": "Research paper on climate change",
+    "task_type": "Research paper",
+    "goal_description": (
+        "Deeply understand the mechanisms of climate change and "
+        "their environmental impacts."
+    ),
+}
+_DEMO_STRATEGIES = (
+    "Elaborative interrogation (ask why/how questions)",
+    "Self‑explanation (teach it aloud or in writing)",
+    "Concept mapping / diagrams",
+)
 
 
 def create_new_session(default_demo: bool = False) -> str:
@@ -92,76 +133,22 @@ def create_new_session(default_demo: bool = False) -> str:
     Returns:
         The ID of the newly created session.
     """
-    sid = str(uuid.uuid4())
+    sid = uuid.uuid4().hex
     now = time.time()
 
+    session = {
+        "id": sid,
+        "name": "New session",
+        "created_at": now,
+        "updated_at": now,
+        **_blank_session_fields(),
+    }
     if default_demo:
-        session = {
-            "id": sid,
-            "name": "Research paper on climate change",
-            "created_at": now,
-            "updated_at": now,
-            "task_name": "Research paper on climate change",
-            "task_type": "Research paper",
-            "goal_type": "mastery",
-            "goal_description": (
-                "Deeply understand the mechanisms of climate change and "
-                "their environmental impacts."
-            ),
-            "deadline": "",
-            "requirements": "",
-            "subtasks": "",
-            "prior_knowledge": "",
-            "knowledge_gaps": "",
-            "anticipated_challenges": "",
-            "contingency_plan": "",
-            "chosen_strategies": [
-                "Elaborative interrogation (ask why/how questions)",
-                "Self‑explanation (teach it aloud or in writing)",
-                "Concept mapping / diagrams",
-            ],
-            "session_plan": "",
-            "recent_sessions": [],
-            "resources": [],
-            "reflections": {
-                "goal": "",
-                "strategies": "",
-                "time": "",
-                "growth": "",
-            },
-            "total_time_minutes": 0,
-        }
-    else:
-        session = {
-            "id": sid,
-            "name": "New session",
-            "created_at": now,
-            "updated_at": now,
-            "task_name": "",
-            "task_type": "",
-            "goal_type": "mastery",
-            "goal_description": "",
-            "deadline": "",
-            "requirements": "",
-            "subtasks": "",
-            "prior_knowledge": "",
-            "knowledge_gaps": "",
-            "anticipated_challenges": "",
-            "contingency_plan": "",
-            "chosen_strategies": [],
-            "session_plan": "",
-            "recent_sessions": [],
-            "resources": [],
-            "reflections": {
-                "goal": "",
-                "strategies": "",
-                "time": "",
-                "growth": "",
-            },
-            "total_time_minutes": 0,
-        }
+        session.update(_DEMO_SESSION_FIELDS)
+        session["chosen_strategies"] = list(_DEMO_STRATEGIES)
 
     st.session_state["sessions"][sid] = session
+    st.session_state.setdefault("session_order", []).insert(0, sid)
     st.session_state["current_session_id"] = sid
     return sid
 
@@ -185,13 +172,46 @@ def update_current_session(updates: Dict[str, Any]) -> None:
     Args:
         updates: a dictionary of keys and values to merge into the
             current session. The ``updated_at`` timestamp will be
-            automatically refreshed.
+            automatically refreshed. Updates that change nothing are
+            ignored.
     """
     session = get_current_session()
+    if all(session.get(key) == value for key, value in updates.items()):
+        return
     session.update(updates)
+    _touch_session(session)
+
+
+def append_to_current_session(field: str, item: Any) -> None:
+    """Append ``item`` to a list field of the current session in place.
+
+    Unlike ``update_current_session`` this does not copy or compare the
+    whole list, so adding one entry costs the same however long the list
+    already is.
+
+    Args:
+        field: name of a list-valued session field (e.g. ``resources``).
+        item: the value to append.
+    """
+    session = get_current_session()
+    session.setdefault(field, []).append(item)
+    _touch_session(session)
+
+
+def _touch_session(session: Dict[str, Any]) -> None:
+    """Record that ``session`` changed: mark it dirty and move it to the front."""
+    # Mark unsaved changes so save_current_session can skip no-op saves
+    session["_dirty"] = True
     session["updated_at"] = time.time()
     st.session_state["sessions"][session["id"]] = session
 
+    # Keep the most recently updated session at the front of the order
+    order = st.session_state.setdefault("session_order", [])
+    if not order or order[0] != session["id"]:
+        if session["id"] in order:
+            order.remove(session["id"])
+        order.insert(0, session["id"])
+
 
 def save_current_session() -> None:
     """Persist the current session to session storage.
@@ -202,10 +222,16 @@ def save_current_session() -> None:
     future implementation where sessions might be written to disk or
     cloud storage. It also triggers a toast notification in the UI to
     confirm the save action.
+
+    Every change already went through ``update_current_session``, which
+    refreshed ``updated_at`` and flagged the session as dirty, so a save
+    with nothing new to write returns without touching the session.
     """
-    # Even though nothing happens here, call update_current_session with
-    # an empty dict to refresh the updated_at timestamp.
-    update_current_session({})
+    session = get_current_session()
+    if not session.get("_dirty"):
+        st.toast("Already saved ✅")
+        return
+    session["_dirty"] = False
     st.toast("Session saved ✅")
 
 
@@ -213,68 +239,92 @@ def delete_session(session_id: str) -> None:
     """Delete a session from storage.
 
     If the deleted session is the current one, the app will select
-    another existing session (if available) or create a new empty one.
+    another existing session (if available) or create a new empty one,
+    and the time tracker is stopped and reloaded from that session so a
+    running timer doesn't credit the deleted session's time to it.
 
     Args:
         session_id: ID of the session to remove.
     """
     sessions = st.session_state.get("sessions", {})
+    order = st.session_state.get("session_order", [])
     if session_id in sessions:
         del sessions[session_id]
+    if session_id in order:
+        order.remove(session_id)
     if st.session_state.get("current_session_id") == session_id:
-        if sessions:
-            # Pick the first remaining session
-            st.session_state["current_session_id"] = next(iter(sessions.keys()))
+        if order:
+            # Switch to the most recently used remaining session
+            st.session_state["current_session_id"] = order[0]
         else:
             create_new_session(default_demo=False)
+        reset_timer(float(get_current_session().get("total_time_minutes", 0) or 0))
+
+
+def monotonic_ms() -> int:
+    """Return the monotonic clock in integer milliseconds.
+
+    The timer helpers below accept an optional ``now_ms`` so a caller can
+    read the clock once per rerun and use that one reading throughout.
+    """
+    return time.monotonic_ns() // 1_000_000
 
 
-def start_timer() -> None:
+def start_timer(now_ms: Optional[int] = None) -> None:
     """Begin or resume the time tracker for the current session."""
     if not st.session_state.get("timer_running"):
         st.session_state["timer_running"] = True
-        st.session_state["timer_start_ts"] = time.time()
+        st.session_state["timer_start_ms"] = (
+            monotonic_ms() if now_ms is None else now_ms
+        )
 
 
-def pause_timer() -> None:
-    """Pause the time tracker and accumulate elapsed minutes."""
+def pause_timer(now_ms: Optional[int] = None) -> None:
+    """Pause the time tracker, folding the current run into the total."""
     if st.session_state.get("timer_running"):
-        sync_timer_with_session()
+        st.session_state["timer_base_ms"] = timer_elapsed_ms(now_ms)
         st.session_state["timer_running"] = False
-        st.session_state["timer_start_ts"] = None
+        st.session_state["timer_start_ms"] = None
+        sync_timer_with_session()
+
 
+def reset_timer(total_minutes: float = 0) -> None:
+    """Stop the time tracker and set its total.
 
-def reset_timer() -> None:
-    """Reset the accumulated time for the current session."""
-    update_current_session({"total_time_minutes": 0})
+    Used with the default to clear the logged time, and with a session's
+    ``total_time_minutes`` when that session is loaded.
+    """
     st.session_state["timer_running"] = False
-    st.session_state["timer_start_ts"] = None
+    st.session_state["timer_start_ms"] = None
+    st.session_state["timer_base_ms"] = round(total_minutes * 60_000)
+    sync_timer_with_session()
 
 
-def sync_timer_with_session() -> None:
-    """Accumulate elapsed time (in whole minutes) into the current session.
+def timer_elapsed_ms(now_ms: Optional[int] = None) -> int:
+    """Return the total logged time in milliseconds, including a run in progress.
 
-    This function should be called on each app rerun to ensure that
-    ongoing timers correctly update ``total_time_minutes``. It adds
-    only whole minutes to avoid double‑counting seconds across rapid
-    reruns.
+    Elapsed time is always measured from the single monotonic reading
+    taken when the timer started, never summed tick by tick, so frequent
+    reruns neither drop fractions of a second nor accumulate rounding.
+    Integer milliseconds keep the arithmetic exact however long the
+    timer runs; minutes are only derived when written to the session.
     """
-    if not st.session_state.get("timer_running"):
-        return
-    start_ts = st.session_state.get("timer_start_ts")
-    if not start_ts:
-        return
-    now = time.time()
-    elapsed_seconds = now - start_ts
-    if elapsed_seconds <= 0:
-        return
-    minutes = int(elapsed_seconds // 60)
-    if minutes > 0:
-        session = get_current_session()
-        current_minutes = int(session.get("total_time_minutes", 0))
-        update_current_session({"total_time_minutes": current_minutes + minutes})
-        # Set the new base for calculating elapsed time
-        st.session_state["timer_start_ts"] = now
+    total = st.session_state.get("timer_base_ms", 0)
+    start_ms = st.session_state.get("timer_start_ms")
+    if st.session_state.get("timer_running") and start_ms is not None:
+        if now_ms is None:
+            now_ms = monotonic_ms()
+        total += max(now_ms - start_ms, 0)
+    return total
+
+
+def sync_timer_with_session(now_ms: Optional[int] = None) -> None:
+    """Mirror the time tracker's total into ``total_time_minutes``.
+
+    Called on each rerun of the time step while the timer runs, and
+    whenever it is paused or reset.
+    """
+    update_current_session({"total_time_minutes": timer_elapsed_ms(now_ms) / 60_000})
 
 
 def format_time_from_minutes(total_minutes: int) -> str:
@@ -5,12 +5,14 @@ This module imports each concrete ``BaseStep`` subclass and constructs
 an ordered list called ``STEPS``. The application iterates over this
 list to render the module selector and to locate the active step. A
 helper function ``get_step_by_id`` returns the step instance for a
-given identifier.
+given identifier using a dictionary built alongside ``STEPS``.
 """
 
 from __future__ import annotations
 
-from typing import List, Optional
+from typing import Dict, List, Optional
+
+from .base import BaseStep
 
 # Import each step class. If you add a new step, import it here and
 # append an instance to the STEPS list.
@@ -37,6 +39,9 @@ STEPS: List[BaseStep] = [
     FeedbackStep(),
 ]
 
+# Index of steps by identifier so the active step is found in O(1).
+_STEPS_BY_ID: Dict[str, BaseStep] = {step.id: step for step in STEPS}
+
 
 def get_step_by_id(step_id: str) -> Optional[BaseStep]:
     """Return the step instance with the matching identifier.
@@ -47,7 +52,4 @@ def get_step_by_id(step_id: str) -> Optional[BaseStep]:
     Returns:
         The corresponding step instance, or ``None`` if not found.
     """
-    for step in STEPS:
-        if step.id == step_id:
-            return step
-    return None
+    return _STEPS_BY_ID.get(step_id)
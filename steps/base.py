@@ -13,6 +13,32 @@ from __future__ import annotations
 from abc import ABC, abstractmethod
 from typing import Dict, Any
 
+import streamlit as st
+
+from services.ai import ai_rate_limit_message, safe_ai, safe_ai_stream
+
+
+# Saved AI replies longer than this are cut at a paragraph break, with
+# the rest tucked into a collapsed expander.
+AI_REPLY_PREVIEW_CHARS = 2000
+
+
+def render_ai_reply(text: str, limit: int = AI_REPLY_PREVIEW_CHARS) -> None:
+    """Render an AI reply, collapsing everything past ``limit`` characters.
+
+    The split happens at the last blank line before ``limit`` (or at
+    ``limit`` if there is none) so both halves remain valid markdown.
+    """
+    if len(text) <= limit:
+        st.markdown(text)
+        return
+    cut = text.rfind("\n\n", 0, limit)
+    if cut <= 0:
+        cut = limit
+    st.markdown(text[:cut])
+    with st.expander("Show full response", expanded=False):
+        st.markdown(text[cut:].lstrip("\n"))
+
 
 class BaseStep(ABC):
     """Abstract base class defining the interface for a SRL step."""
@@ -51,7 +77,58 @@ class BaseStep(ABC):
             A string containing the AI-generated reply, a cached response, or
             a throttle warning if requests are too frequent.
         """
-        # Local import to avoid circular dependencies at module load time.
-        from services.ai import safe_ai  # type: ignore
+        return safe_ai(self.id, user_message, session)
+
+    def render_ai_panel(
+        self,
+        session: Dict[str, Any],
+        prompt_label: str,
+        button_label: str,
+        height: int = 120,
+    ) -> None:
+        """
+        Render this step's "Ask AI" input, button and latest reply.
+
+        The reply is streamed through ``safe_ai_stream`` (cached and rate
+        limited) and kept in ``st.session_state["ai_responses"]`` so it is
+        shown again on later reruns. Once a reply exists, a Regenerate
+        button asks the model again for the same message, bypassing the
+        caches. Widget keys are derived from the step's ``id``
+        (``<id>_ai_input``, ``<id>_ai_button`` and ``<id>_ai_regenerate``).
+
+        Args:
+            session: The current session dictionary providing context.
+            prompt_label: Label for the message text area.
+            button_label: Label for the submit button.
+            height: Height of the text area in pixels.
+        """
+        # A form keeps typing in the text area from rerunning the app
+        with st.form(f"{self.id}_ai_form", clear_on_submit=False):
+            msg = st.text_area(prompt_label, key=f"{self.id}_ai_input", height=height)
+            submitted = st.form_submit_button(button_label, key=f"{self.id}_ai_button")
+
+        ai_responses = st.session_state["ai_responses"]
+        regenerate_key = f"{self.id}_ai_regenerate"
+        # The Regenerate button is drawn below the reply, so read its click
+        # from session state before the reply is rendered
+        regenerate = bool(
+            st.session_state.get(regenerate_key) and ai_responses.get(self.id)
+        )
+
+        if (submitted or regenerate) and msg.strip():
+            st.markdown("###### AI suggestion")
+            throttled = ai_rate_limit_message() if regenerate else ""
+            if throttled:
+                # Keep the saved reply rather than replacing it with the warning
+                st.warning(throttled)
+                render_ai_reply(ai_responses[self.id])
+            else:
+                ai_responses[self.id] = st.write_stream(
+                    safe_ai_stream(self.id, msg, session, refresh=regenerate)
+                )
+        elif ai_responses.get(self.id):
+            st.markdown("###### AI suggestion")
+            render_ai_reply(ai_responses[self.id])
 
-        return safe_ai(self.id, user_message, session)
\ No newline at end of file
+        if ai_responses.get(self.id):
+            st.button("🔄 Regenerate", key=regenerate_key)
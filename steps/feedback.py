@@ -13,8 +13,8 @@ from __future__ import annotations
 import streamlit as st
 from typing import Any, Dict
 
-from .base import BaseStep
-from services.ai import safe_ai
+from .base import BaseStep, render_ai_reply
+from services.ai import clear_ai_cache, safe_ai_stream
 
 
 class FeedbackStep(BaseStep):
@@ -38,9 +38,9 @@ class FeedbackStep(BaseStep):
             col1, col2 = st.columns([3, 1])
             
             with col1:
-                # Show cache stats
-                cache_size = len(st.session_state.get("ai_cache", {}))
-                st.caption(f"**Cached responses:** {cache_size}")
+                # Show cache stats; filled in below, after any Clear Cache
+                # click in this run, so the count is never stale.
+                cache_caption = st.empty()
                 st.caption(
                     "💡 Clear the cache if you've changed your API key, "
                     "see old error messages, or want completely fresh responses."
@@ -50,17 +50,18 @@ class FeedbackStep(BaseStep):
                 # Cache clear button
                 if st.button("🔄 Clear Cache", key="clear_ai_cache", use_container_width=True):
                     # Clear AI cache
-                    if "ai_cache" in st.session_state:
-                        st.session_state["ai_cache"] = {}
-                    if "ai_last_call_ts" in st.session_state:
-                        st.session_state["ai_last_call_ts"] = 0.0
+                    clear_ai_cache()
                     # Clear cached AI responses in this module
-                    if "ai_responses" in st.session_state and self.id in st.session_state["ai_responses"]:
+                    if self.id in st.session_state["ai_responses"]:
                         del st.session_state["ai_responses"][self.id]
-                    
+
+                    # The response section below is rendered after this point
+                    # in the same run, so no extra rerun is needed to hide it.
                     st.success("✅ Cache cleared successfully!")
                     st.info("Try your request again - it will now make a fresh API call.")
-                    st.rerun()
+
+            cache_size = len(st.session_state.get("ai_cache", {}))
+            cache_caption.caption(f"**Cached responses:** {cache_size}")
 
         # ========== MAIN FEEDBACK INPUT ==========
         msg = st.text_area(
@@ -71,22 +72,25 @@ class FeedbackStep(BaseStep):
         )
 
         # ========== GET FEEDBACK BUTTON ==========
+        ai_responses = st.session_state["ai_responses"]
         if st.button("💬 Get feedback", key="feedback_button", type="primary") and msg.strip():
-            # Use the safe AI wrapper to generate supportive feedback
-            # with caching and simple rate limiting, consistent with other steps.
-            with st.spinner("Gathering feedback..."):
-                reply = safe_ai(self.id, msg, session)
-            st.session_state.setdefault("ai_responses", {})[self.id] = reply
+            # Stream supportive feedback as it arrives, with caching and
+            # simple rate limiting, consistent with other steps.
+            st.markdown("---")
+            st.markdown("##### 🤖 AI Suggestion")
+            response_text = st.write_stream(safe_ai_stream(self.id, msg, session))
+            ai_responses[self.id] = response_text
 
         # ========== DISPLAY AI RESPONSE ==========
         # Display last AI response, if available
-        if st.session_state.get("ai_responses", {}).get(self.id):
-            st.markdown("---")
-            st.markdown("##### 🤖 AI Suggestion")
-            
-            response_text = st.session_state["ai_responses"][self.id]
-            st.markdown(response_text)
-            
+        else:
+            response_text = ai_responses.get(self.id)
+            if response_text:
+                st.markdown("---")
+                st.markdown("##### 🤖 AI Suggestion")
+                render_ai_reply(response_text)
+
+        if response_text:
             # ========== HELPFUL HINTS FOR ERRORS ==========
             # Show a hint if the response looks like an error
             if "⚠️" in response_text or "error" in response_text.lower():
@@ -11,12 +11,12 @@ for refining the goal.
 
 from __future__ import annotations
 
+from datetime import date
 from typing import Any, Dict
 
 import streamlit as st
 
 from state import update_current_session
-from services.ai import safe_ai
 from .base import BaseStep
 
 
@@ -77,10 +77,12 @@ class GoalsStep(BaseStep):
             )
 
         with col2:
+            # Deadlines are stored as ISO date strings; parse only for the widget
+            saved_deadline = session.get("deadline")
             deadline_date = st.date_input(
                 "Target completion date (optional)",
                 key="goal_deadline",
-                value=None,
+                value=date.fromisoformat(saved_deadline) if saved_deadline else None,
                 help="You can leave this as default if you're not sure.",
             )
 
@@ -286,14 +288,7 @@ class GoalsStep(BaseStep):
                 else "performance"
             )
 
-            # Try to turn date into ISO string if it exists
-            if deadline_date:
-                try:
-                    deadline_str = deadline_date.isoformat()
-                except AttributeError:
-                    deadline_str = str(deadline_date)
-            else:
-                deadline_str = ""
+            deadline_str = deadline_date.isoformat() if deadline_date else ""
 
             # Unified goal payload (also stored under session["goal"])
             goal_payload = {
@@ -365,23 +360,10 @@ class GoalsStep(BaseStep):
         st.markdown("---")
         st.markdown("##### Ask AI to refine your goal")
 
-        user_msg = st.text_area(
+        self.render_ai_panel(
+            session,
             "Describe what you want to achieve, and the assistant will suggest a clearer mastery goal.",
-            key="goal_ai_input",
+            "✨ Improve my goal",
             height=100,
         )
-        if (
-            st.button("✨ Improve my goal", key="goal_ai_button")
-            and user_msg.strip()
-        ):
-            # Use the safe wrapper to call the AI once per unique prompt and enforce rate limits
-            with st.spinner("Thinking about your goal..."):
-                reply = safe_ai(self.id, user_msg, session)
-            # Cache and display the response
-            st.session_state.setdefault("ai_responses", {})[self.id] = reply
-
-        # Display last AI response if available
-        if st.session_state.get("ai_responses", {}).get(self.id):
-            st.markdown("###### AI suggestion")
-            st.markdown(st.session_state["ai_responses"][self.id])
 
@@ -10,15 +10,22 @@ assistant can ask deeper questions or highlight patterns.
 
 from __future__ import annotations
 
-from typing import Any, Dict
+from types import MappingProxyType
+from typing import Any, Dict, Mapping
 
 import streamlit as st
 
 from state import update_current_session
-from services.ai import safe_ai
 from .base import BaseStep
 
 
+# Read-only fallback for sessions without saved reflections; shared across
+# reruns instead of building a fresh dict each time.
+_EMPTY_REFLECTIONS: Mapping[str, str] = MappingProxyType(
+    {"goal": "", "strategies": "", "time": "", "growth": ""}
+)
+
+
 class ReflectionStep(BaseStep):
     """Reflection SRL step."""
 
@@ -34,46 +41,50 @@ class ReflectionStep(BaseStep):
         )
 
         # Get any existing reflection for this session
-        refs = session.get(
-            "reflections",
-            {"goal": "", "strategies": "", "time": "", "growth": ""},
-        )
+        refs = session.get("reflections") or _EMPTY_REFLECTIONS
 
         # ---- Four reflection prompts (editable) ----
-        goal_ref = st.text_area(
-            "1. Goal achievement – What did you actually learn or understand? Did you reach your mastery goal?",
-            value=refs.get("goal", ""),
-            key="refl_goal",
-            height=120,
-        )
-        strat_ref = st.text_area(
-            "2. Strategies – Which strategies helped most? Which did you not use or found unhelpful?",
-            value=refs.get("strategies", ""),
-            key="refl_strategies",
-            height=120,
-        )
-        time_ref = st.text_area(
-            "3. Time & focus – How well did you stick to your plan? What affected your focus?",
-            value=refs.get("time", ""),
-            key="refl_time",
-            height=120,
-        )
-        growth_ref = st.text_area(
-            "4. Next steps – What will you do **differently** for the next similar task?",
-            value=refs.get("growth", ""),
-            key="refl_growth",
-            height=120,
-        )
-
-        if st.button("Save reflection", key="save_reflection"):
+        # A form batches the edits so typing in one box doesn't rerun the
+        # app; everything is submitted together with the Save button.
+        with st.form("reflection_form", clear_on_submit=False):
+            goal_ref = st.text_area(
+                "1. Goal achievement – What did you actually learn or understand? Did you reach your mastery goal?",
+                value=refs.get("goal", ""),
+                key="refl_goal",
+                height=120,
+            )
+            strat_ref = st.text_area(
+                "2. Strategies – Which strategies helped most? Which did you not use or found unhelpful?",
+                value=refs.get("strategies", ""),
+                key="refl_strategies",
+                height=120,
+            )
+            time_ref = st.text_area(
+                "3. Time & focus – How well did you stick to your plan? What affected your focus?",
+                value=refs.get("time", ""),
+                key="refl_time",
+                height=120,
+            )
+            growth_ref = st.text_area(
+                "4. Next steps – What will you do **differently** for the next similar task?",
+                value=refs.get("growth", ""),
+                key="refl_growth",
+                height=120,
+            )
+            submitted = st.form_submit_button("Save reflection")
+
+        if submitted:
             new_refs = {
                 "goal": goal_ref.strip(),
                 "strategies": strat_ref.strip(),
                 "time": time_ref.strip(),
                 "growth": growth_ref.strip(),
             }
-            update_current_session({"reflections": new_refs})
-            st.success("Reflection saved 🌱")
+            if new_refs == session.get("reflections"):
+                st.toast("No changes to save")
+            else:
+                update_current_session({"reflections": new_refs})
+                st.success("Reflection saved 🌱")
             # Note: `session` is updated via update_current_session, so the
             # summary block below will pick up the new values on this rerun.
 
@@ -99,18 +110,9 @@ class ReflectionStep(BaseStep):
         st.markdown("---")
         st.markdown("##### Ask AI to deepen your reflection")
 
-        msg = st.text_area(
+        self.render_ai_panel(
+            session,
             "Paste a short summary of what happened (or the text above), and the assistant will ask a few deeper questions or highlight patterns.",
-            key="reflection_ai_input",
+            "🪞 Help me reflect",
             height=150,
         )
-
-        if st.button("🪞 Help me reflect", key="reflection_ai_button") and msg.strip():
-            # Use the safe AI wrapper to deepen reflection with caching and rate limiting
-            with st.spinner("Thinking with you about this experience..."):
-                reply = safe_ai(self.id, msg, session)
-            st.session_state.setdefault("ai_responses", {})[self.id] = reply
-
-        if st.session_state.get("ai_responses", {}).get(self.id):
-            st.markdown("###### AI suggestion")
-            st.markdown(st.session_state["ai_responses"][self.id])
@@ -10,16 +10,63 @@ list.
 
 from __future__ import annotations
 
-from typing import Any, Dict
+from typing import Any, Dict, List
 import time
 
 import streamlit as st
 
-from state import update_current_session
-from services.ai import safe_ai
+from state import append_to_current_session
 from .base import BaseStep
 
 
+# Number of most recent resources listed outside the "earlier" expander
+RECENT_RESOURCES_SHOWN = 30
+
+
+def _format_resource_line(r: Dict[str, Any]) -> str:
+    """Return the markdown list item for one resource in a single pass."""
+    typ = r.get("type")
+    link = r.get("link")
+    return (
+        f"- **{r.get('name', '(no name)')}**"
+        f"{'  ·  ' + typ if typ else ''}"
+        f"{'  ·  ' + link if link else ''}"
+    )
+
+
+def _render_resource_rows(
+    resources: List[Dict[str, Any]],
+    files: Dict[str, Any],
+    start: int,
+    stop: int,
+) -> None:
+    """Render ``resources[start:stop]`` with download buttons for uploads.
+
+    The entries are emitted as a single markdown list rather than one
+    element per resource; download buttons follow for any entry that has
+    an uploaded file, each labelled with its resource so it can be matched
+    to its row.
+    """
+    rows = resources[start:stop]
+    st.markdown("\n".join(map(_format_resource_line, rows)))
+
+    downloads = [
+        (idx, r, files[r["upload_id"]])
+        for idx, r in enumerate(rows, start)
+        if r.get("upload_id") in files
+    ]
+
+    # If a resource has an uploaded file, show a download button
+    for idx, r, file_meta in downloads:
+        st.download_button(
+            label=f"Download file for {r.get('name', '(no name)')}: {file_meta['name']}",
+            data=file_meta["data"],
+            file_name=file_meta["name"],
+            mime=file_meta["mime"],
+            key=f"resource_dl_{idx}",
+        )
+
+
 class ResourcesStep(BaseStep):
     """Resources SRL step."""
 
@@ -37,54 +84,61 @@ class ResourcesStep(BaseStep):
         # Clear resource inputs on the next run after a successful add
         if st.session_state.get("clear_resource_inputs"):
             for key in ("res_name", "res_type", "res_link", "res_upload"):
-                if key in st.session_state:
-                    del st.session_state[key]
+                st.session_state.pop(key, None)
             st.session_state["clear_resource_inputs"] = False
 
         st.subheader("📚 Resources")
         st.markdown("List the key resources you will actually use for this task.")
 
-        # Input widgets for adding a resource
-        res_name = st.text_input(
-            "Resource name or short description",
-            key="res_name",
-            placeholder="e.g., Chapter 5: Climate Systems (textbook)",
-        )
-        res_type = st.selectbox(
-            "Type",
-            [
-                "",
-                "Textbook / reading",
-                "Academic article",
-                "Video / tutorial",
-                "Tool / software",
-                "Person / tutor / office hours",
-                "Other",
-            ],
-            key="res_type",
-        )
-
-        st.markdown(
-            "You can either **paste a link/location** or **upload a file** (or both)."
-        )
-
-        res_link = st.text_input(
-            "Link or location (optional)",
-            key="res_link",
-            placeholder="https://... or 'Library, shelf QC 903'",
-        )
-
-        res_upload = st.file_uploader(
-            "Upload a file from your computer (optional)",
-            key="res_upload",
-        )
-
-        if st.button("➕ Add resource", key="add_resource"):
+        # Input widgets for adding a resource. The form submits them
+        # together, so filling in each field doesn't rerun the app.
+        with st.form("add_resource_form", clear_on_submit=False):
+            res_name = st.text_input(
+                "Resource name or short description",
+                key="res_name",
+                placeholder="e.g., Chapter 5: Climate Systems (textbook)",
+            )
+            res_type = st.selectbox(
+                "Type",
+                [
+                    "",
+                    "Textbook / reading",
+                    "Academic article",
+                    "Video / tutorial",
+                    "Tool / software",
+                    "Person / tutor / office hours",
+                    "Other",
+                ],
+                key="res_type",
+            )
+
+            st.markdown(
+                "You can either **paste a link/location** or **upload a file** (or both)."
+            )
+
+            res_link = st.text_input(
+                "Link or location (optional)",
+                key="res_link",
+                placeholder="https://... or 'Library, shelf QC 903'",
+            )
+
+            res_upload = st.file_uploader(
+                "Upload a file from your computer (optional)",
+                key="res_upload",
+            )
+
+            add_clicked = st.form_submit_button("➕ Add resource", key="add_resource")
+
+        if add_clicked:
+            entry_key = (res_name.strip(), res_type.strip(), res_link.strip())
             if not res_name.strip():
                 st.warning("Give the resource at least a short name.")
+            elif res_upload is None and any(
+                (r.get("name"), r.get("type"), r.get("link")) == entry_key
+                for r in session.get("resources", [])
+            ):
+                st.info("That resource is already in your list.")
             else:
-                resources = list(session.get("resources", []))
-
                 # Create a simple unique id for any uploaded file
                 upload_id = None
                 if res_upload is not None:
@@ -96,16 +150,16 @@ class ResourcesStep(BaseStep):
                         "data": res_upload.getvalue(),
                     }
 
-                resources.append(
+                append_to_current_session(
+                    "resources",
                     {
                         "name": res_name.strip(),
                         "type": res_type.strip(),
                         "link": res_link.strip(),
                         # only present if a file was uploaded
                         "upload_id": upload_id,
-                    }
+                    },
                 )
-                update_current_session({"resources": resources})
                 st.success("Resource added.")
 
                 # Tell the next rerun to clear the inputs *before* widgets are built
@@ -117,42 +171,20 @@ class ResourcesStep(BaseStep):
 
         if resources:
             st.markdown("##### Your resources")
-            for idx, r in enumerate(resources):
-                line = f"- **{r.get('name', '(no name)')}**"
-                if r.get("type"):
-                    line += f"  ·  {r['type']}"
-                if r.get("link"):
-                    line += f"  ·  {r['link']}"
-                st.markdown(line)
-
-                # If this resource has an uploaded file, show a download button
-                upload_id = r.get("upload_id")
-                if upload_id and upload_id in files:
-                    file_meta = files[upload_id]
-                    st.download_button(
-                        label=f"Download file: {file_meta['name']}",
-                        data=file_meta["data"],
-                        file_name=file_meta["name"],
-                        mime=file_meta["mime"],
-                        key=f"resource_dl_{idx}",
-                    )
+            # Only the most recent entries are drawn inline; older ones sit
+            # in a collapsed expander so long lists stay cheap to render.
+            split = max(len(resources) - RECENT_RESOURCES_SHOWN, 0)
+            if split:
+                with st.expander(f"Earlier resources ({split})", expanded=False):
+                    _render_resource_rows(resources, files, 0, split)
+            _render_resource_rows(resources, files, split, len(resources))
 
         st.markdown("---")
         st.markdown("##### Ask AI for resource ideas")
 
-        msg = st.text_area(
+        self.render_ai_panel(
+            session,
             "Describe what kind of explanations, examples, or tools help you most, and the assistant can suggest resource types.",
-            key="resources_ai_input",
-            height=120,
+            "🔎 Suggest resources",
         )
 
-        if st.button("🔎 Suggest resources", key="resources_ai_button") and msg.strip():
-            # Use the safe AI wrapper to generate resource suggestions with caching and rate limiting
-            with st.spinner("Looking for resource ideas..."):
-                reply = safe_ai(self.id, msg, session)
-            st.session_state.setdefault("ai_responses", {})[self.id] = reply
-
-        if st.session_state.get("ai_responses", {}).get(self.id):
-            st.markdown("###### AI suggestion")
-            st.markdown(st.session_state["ai_responses"][self.id])
-
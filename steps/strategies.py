@@ -13,7 +13,6 @@ from typing import Any, Dict, List
 import streamlit as st
 
 from state import update_current_session
-from services.ai import safe_ai
 from .base import BaseStep
 
 
@@ -31,6 +30,9 @@ DEFAULT_STRATEGIES: List[str] = [
     "Doing challenge problems after basics",
 ]
 
+# Set view of the defaults for O(1) membership checks
+_DEFAULT_STRATEGY_SET = frozenset(DEFAULT_STRATEGIES)
+
 
 class StrategiesStep(BaseStep):
     """Learning strategies SRL step."""
@@ -43,8 +45,7 @@ class StrategiesStep(BaseStep):
     def render(self, session: Dict[str, Any]) -> None:
         # -------- Clear the 'new strategy' input on the next run --------
         if st.session_state.get("clear_new_strategy_input"):
-            if "new_strategy_text" in st.session_state:
-                del st.session_state["new_strategy_text"]
+            st.session_state.pop("new_strategy_text", None)
             st.session_state["clear_new_strategy_input"] = False
 
         st.subheader("💡 Learning Strategies")
@@ -60,7 +61,7 @@ class StrategiesStep(BaseStep):
 
         # Combine default + custom strategies for the multiselect options
         all_options = DEFAULT_STRATEGIES + [
-            s for s in custom_strats if s not in DEFAULT_STRATEGIES
+            s for s in custom_strats if s not in _DEFAULT_STRATEGY_SET
         ]
 
         # ---- Multiselect for strategy choices ----
@@ -89,7 +90,7 @@ class StrategiesStep(BaseStep):
             if not cleaned:
                 st.warning("Please type a strategy before adding it.")
             else:
-                if cleaned in all_options:
+                if cleaned in _DEFAULT_STRATEGY_SET or cleaned in custom_strats:
                     st.info("That strategy is already in your list.")
                 else:
                     custom_strats.append(cleaned)
@@ -127,27 +128,19 @@ class StrategiesStep(BaseStep):
         # ---- Quick summary of chosen strategies ----
         if selected_now:
             st.markdown("##### Your chosen strategies for this task")
-            for s_item in selected_now:
-                st.markdown(f"- {s_item}")
+            st.markdown("\n".join(f"- {s_item}" for s_item in selected_now))
 
         st.markdown("---")
         st.markdown("##### Ask AI for strategy ideas")
 
-        msg = st.text_area(
-            "Describe your situation (time available, task type, how you like to study), "
-            "and the assistant will suggest strategies.",
-            key="strategies_ai_input",
+        self.render_ai_panel(
+            session,
+            (
+                "Describe your situation (time available, task type, how you like to study), "
+                "and the assistant will suggest strategies."
+            ),
+            "✨ Suggest strategies",
             height=150,
         )
 
-        if st.button("✨ Suggest strategies", key="strategies_ai_button") and msg.strip():
-            # Use the safe AI wrapper to generate strategy suggestions with caching and rate limiting
-            with st.spinner("Thinking about strategies that might fit..."):
-                reply = safe_ai(self.id, msg, session)
-            st.session_state.setdefault("ai_responses", {})[self.id] = reply
-
-        if st.session_state.get("ai_responses", {}).get(self.id):
-            st.markdown("###### AI suggestion")
-            st.markdown(st.session_state["ai_responses"][self.id])
-
 
@@ -15,7 +15,6 @@ from typing import Any, Dict
 import streamlit as st
 
 from state import update_current_session
-from services.ai import safe_ai
 from .base import BaseStep
 
 
@@ -41,53 +40,59 @@ class TaskAnalysisStep(BaseStep):
         )
 
         # ---------------- Editable fields ----------------
-        # Requirements
-        requirements = st.text_area(
-            "What are the key requirements or rubric criteria?",
-            value=session.get("requirements", ""),
-            key="task_requirements",
-            height=120,
-        )
-        # Subtasks
-        subtasks = st.text_area(
-            "Break your task into smaller subtasks (one per line).",
-            value=session.get("subtasks", ""),
-            key="task_subtasks",
-            height=120,
-            placeholder="e.g.,\nFind 5 credible sources\nCreate an outline\nDraft introduction\n...",
-        )
-        # Prior knowledge and gaps
-        col1, col2 = st.columns(2)
-        with col1:
-            prior_knowledge = st.text_area(
-                "What do you already know that might help?",
-                value=session.get("prior_knowledge", ""),
-                key="task_prior",
+        # Submitted together, so editing one box doesn't rerun the app
+        with st.form("task_analysis_form", clear_on_submit=False):
+            # Requirements
+            requirements = st.text_area(
+                "What are the key requirements or rubric criteria?",
+                value=session.get("requirements", ""),
+                key="task_requirements",
+                height=120,
+            )
+            # Subtasks
+            subtasks = st.text_area(
+                "Break your task into smaller subtasks (one per line).",
+                value=session.get("subtasks", ""),
+                key="task_subtasks",
+                height=120,
+                placeholder="e.g.,\nFind 5 credible sources\nCreate an outline\nDraft introduction\n...",
+            )
+            # Prior knowledge and gaps
+            col1, col2 = st.columns(2)
+            with col1:
+                prior_knowledge = st.text_area(
+                    "What do you already know that might help?",
+                    value=session.get("prior_knowledge", ""),
+                    key="task_prior",
+                    height=100,
+                )
+            with col2:
+                knowledge_gaps = st.text_area(
+                    "What do you need to review or learn?",
+                    value=session.get("knowledge_gaps", ""),
+                    key="task_gaps",
+                    height=100,
+                )
+            # Challenges and contingency
+            challenges = st.text_area(
+                "What challenges do you anticipate?",
+                value=session.get("anticipated_challenges", ""),
+                key="task_challenges",
                 height=100,
             )
-        with col2:
-            knowledge_gaps = st.text_area(
-                "What do you need to review or learn?",
-                value=session.get("knowledge_gaps", ""),
-                key="task_gaps",
+            contingency = st.text_area(
+                "If those challenges happen, what is your plan B?",
+                value=session.get("contingency_plan", ""),
+                key="task_contingency",
                 height=100,
             )
-        # Challenges and contingency
-        challenges = st.text_area(
-            "What challenges do you anticipate?",
-            value=session.get("anticipated_challenges", ""),
-            key="task_challenges",
-            height=100,
-        )
-        contingency = st.text_area(
-            "If those challenges happen, what is your plan B?",
-            value=session.get("contingency_plan", ""),
-            key="task_contingency",
-            height=100,
-        )
 
-        # ---------------- Save button ----------------
-        if st.button("Save task analysis", key="save_task_analysis"):
+            # ---------------- Save button ----------------
+            submitted = st.form_submit_button(
+                "Save task analysis", key="save_task_analysis"
+            )
+
+        if submitted:
             payload = {
                 "requirements": requirements.strip(),
                 "subtasks": subtasks.strip(),
@@ -121,8 +126,8 @@ class TaskAnalysisStep(BaseStep):
                     st.markdown("**Subtasks**")
                     lines = [l.strip() for l in saved["subtasks"].splitlines() if l.strip()]
                     if lines:
-                        for l in lines:
-                            st.markdown(f"- {l}")
+                        # One markdown list instead of one element per subtask
+                        st.markdown("\n".join(f"- {l}" for l in lines))
                 if saved.get("prior_knowledge") or saved.get("knowledge_gaps"):
                     cols = st.columns(2)
                     with cols[0]:
@@ -143,19 +148,9 @@ class TaskAnalysisStep(BaseStep):
         # ---------------- AI helper ----------------
         st.markdown("---")
         st.markdown("##### Ask AI to check your breakdown")
-        msg = st.text_area(
+        self.render_ai_panel(
+            session,
             "Paste your assignment instructions or your notes, and the assistant can suggest a clearer breakdown.",
-            key="task_ai_input",
-            height=120,
+            "🔍 Improve my breakdown",
         )
-        if st.button("🔍 Improve my breakdown", key="task_ai_button") and msg.strip():
-            # Use the safe AI wrapper to analyze the task breakdown with caching and rate limiting
-            with st.spinner("Analyzing your task..."):
-                reply = safe_ai(self.id, msg, session)
-            st.session_state.setdefault("ai_responses", {})[self.id] = reply
-
-        # Show AI reply
-        if st.session_state.get("ai_responses", {}).get(self.id):
-            st.markdown("###### AI suggestion")
-            st.markdown(st.session_state["ai_responses"][self.id])
 
@@ -15,8 +15,15 @@ from typing import Any, Dict
 
 import streamlit as st
 
-from state import update_current_session
-from services.ai import safe_ai
+from state import (
+    monotonic_ms,
+    pause_timer,
+    reset_timer,
+    start_timer,
+    sync_timer_with_session,
+    timer_elapsed_ms,
+    update_current_session,
+)
 from .base import BaseStep
 
 
@@ -28,6 +35,68 @@ def _format_hhmmss(total_seconds: int) -> str:
     return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
 
 
+def _render_logged_time(total_seconds: int) -> None:
+    """Render the logged-time clock starting from ``total_seconds``.
+
+    The clock ticks in the browser, so a running timer costs no server
+    reruns; the server only folds elapsed time in when the script next
+    runs (any interaction, or pausing the timer).
+    """
+    running = "true" if st.session_state["timer_running"] else "false"
+    # st.html renders into the page itself rather than an iframe, so each
+    # render gets its own element id and the script stops once the element
+    # has been replaced by a later run.
+    clock_id = f"srl-clock-{monotonic_ms()}"
+
+    # Bigger label + vivid digital clock
+    st.html(
+        f"""
+        <div style="font-family:'Source Sans Pro', sans-serif;
+                    font-size:1.25rem;
+                    font-weight:600;
+                    color:#1f2933;
+                    margin:0.25rem 0 1rem 0;">
+          Logged study time for this task:
+          <span id="{clock_id}" style="
+                display:inline-block;
+                margin-left:0.6rem;
+                padding:0.25rem 0.9rem;
+                border-radius:999px;
+                background:#e6ffed;
+                color:#065f46;
+                font-family:'SF Mono', Menlo, Monaco, Consolas,
+                            'Liberation Mono', 'Courier New', monospace;
+                font-size:1.4rem;
+                letter-spacing:0.08em;
+                box-shadow:0 0 0 1px rgba(16,185,129,0.25);
+            ">
+            {_format_hhmmss(total_seconds)}
+          </span>
+        </div>
+        <script>
+          (function () {{
+            var base = {total_seconds};
+            var clock = document.getElementById("{clock_id}");
+            var started = Date.now();
+            function pad(n) {{ return String(n).padStart(2, "0"); }}
+            function tick() {{
+              if (!clock || !clock.isConnected) {{ return; }}
+              var elapsed = Date.now() - started;
+              var total = base + Math.floor(elapsed / 1000);
+              clock.textContent = pad(Math.floor(total / 3600)) + ":" +
+                  pad(Math.floor((total % 3600) / 60)) + ":" + pad(total % 60);
+              setTimeout(tick, 1000 - (elapsed % 1000));
+            }}
+            if ({running}) {{
+              setTimeout(tick, 1000);
+            }}
+          }})();
+        </script>
+        """,
+        unsafe_allow_javascript=True,
+    )
+
+
 class TimePlanStep(BaseStep):
     """Time planning SRL step."""
 
@@ -37,63 +106,20 @@ class TimePlanStep(BaseStep):
     description = "Plan and track your study time."
 
     def render(self, session: Dict[str, Any]) -> None:
-        # ---------- Initialize timer state (before any widgets) ----------
-        # Store timer in seconds in Streamlit session_state
-        if "timer_total_seconds" not in st.session_state:
-            # If we already have minutes stored in the SRL session, pull them in
-            minutes_from_session = float(session.get("total_time_minutes", 0))
-            st.session_state["timer_total_seconds"] = int(minutes_from_session * 60)
-
-        if "timer_running" not in st.session_state:
-            st.session_state["timer_running"] = False
+        # Read the clock once so every timer calculation in this run
+        # (sync, start, pause, display) uses the same instant
+        now_ms = monotonic_ms()
 
-        if "timer_last_tick" not in st.session_state:
-            st.session_state["timer_last_tick"] = time.time()
-
-        # ---------- Update timer if it's currently running ----------
-        now = time.time()
+        # ---------- Persist time logged so far (before any widgets) ----------
         if st.session_state["timer_running"]:
-            elapsed = now - st.session_state["timer_last_tick"]
-            if elapsed > 0:
-                st.session_state["timer_total_seconds"] += int(elapsed)
-                st.session_state["timer_last_tick"] = now
-
-                # Persist updated minutes into the SRL session
-                total_minutes = st.session_state["timer_total_seconds"] / 60.0
-                update_current_session({"total_time_minutes": total_minutes})
-
-        total_seconds = int(st.session_state["timer_total_seconds"])
-        time_display = _format_hhmmss(total_seconds)
+            sync_timer_with_session(now_ms)
 
         # ---------- UI: header + current logged time ----------
         st.subheader("⏱️ Time Management")
 
-        # Bigger label + vivid digital clock
-        st.markdown(
-            f"""
-            <div style="font-size:1.25rem;
-                        font-weight:600;
-                        margin:0.25rem 0 1rem 0;">
-              Logged study time for this task:
-              <span style="
-                    display:inline-block;
-                    margin-left:0.6rem;
-                    padding:0.25rem 0.9rem;
-                    border-radius:999px;
-                    background:#e6ffed;
-                    color:#065f46;
-                    font-family:'SF Mono', Menlo, Monaco, Consolas,
-                                'Liberation Mono', 'Courier New', monospace;
-                    font-size:1.4rem;
-                    letter-spacing:0.08em;
-                    box-shadow:0 0 0 1px rgba(16,185,129,0.25);
-                ">
-                {time_display}
-              </span>
-            </div>
-            """,
-            unsafe_allow_html=True,
-        )
+        # The clock is drawn after the timer buttons are handled, so it
+        # reflects a start/pause/reset from this same run.
+        clock_slot = st.empty()
 
         # ---------- Timer controls + planning controls ----------
         col1, col2 = st.columns(2)
@@ -104,59 +130,54 @@ class TimePlanStep(BaseStep):
                 key="timer_start",
                 use_container_width=True,
             ):
-                # Start or resume: mark running and reset last_tick
-                st.session_state["timer_running"] = True
-                st.session_state["timer_last_tick"] = time.time()
+                start_timer(now_ms)
 
             if st.button(
                 "⏸️ Pause timer",
                 key="timer_pause",
                 use_container_width=True,
             ):
-                # Pause: do one more update and then freeze
-                now = time.time()
-                if st.session_state["timer_running"]:
-                    elapsed = now - st.session_state["timer_last_tick"]
-                    if elapsed > 0:
-                        st.session_state["timer_total_seconds"] += int(elapsed)
-                    st.session_state["timer_running"] = False
-                    st.session_state["timer_last_tick"] = now
-                    total_minutes = st.session_state["timer_total_seconds"] / 60.0
-                    update_current_session({"total_time_minutes": total_minutes})
+                pause_timer(now_ms)
 
             if st.button(
                 "⏹️ Reset total logged time",
                 key="timer_reset",
                 use_container_width=True,
             ):
-                st.session_state["timer_running"] = False
-                st.session_state["timer_total_seconds"] = 0
-                st.session_state["timer_last_tick"] = time.time()
-                update_current_session({"total_time_minutes": 0})
+                reset_timer()
                 st.success("Timer reset.")
 
         with col2:
-            est_minutes = st.number_input(
-                "For your **next** study session, how many minutes do you plan to work?",
-                min_value=5,
-                max_value=240,
-                step=5,
-                value=45,
-                key="time_estimate",
-            )
-            break_pattern = st.selectbox(
-                "Break schedule",
-                [
-                    "Pomodoro (25 min work, 5 min break)",
-                    "50-10 (50 work, 10 break)",
-                    "Long focus (90 min work, 15 min break)",
-                    "Custom / flexible",
-                ],
-                key="time_break_pattern",
-            )
+            # The plan is submitted as a whole, so adjusting the inputs
+            # doesn't rerun the app
+            with st.form("time_plan_form", clear_on_submit=False):
+                est_minutes = st.number_input(
+                    "For your **next** study session, how many minutes do you plan to work?",
+                    min_value=5,
+                    max_value=240,
+                    step=5,
+                    value=45,
+                    key="time_estimate",
+                )
+                break_pattern = st.selectbox(
+                    "Break schedule",
+                    [
+                        "Pomodoro (25 min work, 5 min break)",
+                        "50-10 (50 work, 10 break)",
+                        "Long focus (90 min work, 15 min break)",
+                        "Custom / flexible",
+                    ],
+                    key="time_break_pattern",
+                )
+                save_plan = st.form_submit_button(
+                    "Save time plan", key="save_time_plan"
+                )
+
+        with clock_slot.container():
+            _render_logged_time(timer_elapsed_ms(now_ms) // 1000)
 
         # ---------- Save planned session ----------
-        if st.button("Save time plan", key="save_time_plan"):
+        if save_plan:
             recent = list(session.get("recent_sessions", []))
             recent.insert(
                 0,
@@ -174,42 +195,24 @@ class TimePlanStep(BaseStep):
         # ---------- Show recent planned sessions ----------
         if session.get("recent_sessions"):
             st.markdown("##### Recent planned sessions")
+            lines = []
             for s_item in session["recent_sessions"]:
                 ts = time.strftime(
                     "%b %d, %Y",
                     time.localtime(s_item.get("created_at", time.time())),
                 )
-                st.markdown(
+                lines.append(
                     f"- `{ts}` – planned {s_item.get('estimated_minutes', 0)} min ｜ "
                     f"{s_item.get('break_pattern', '')}"
                 )
+            st.markdown("\n".join(lines))
 
         st.markdown("---")
 
         # ---------- AI helper ----------
         st.markdown("##### Ask AI to adjust your schedule")
-        msg = st.text_area(
+        self.render_ai_panel(
+            session,
             "Explain your weekly schedule and constraints, and the assistant can help you fit this task in realistically.",
-            key="time_ai_input",
-            height=120,
+            "🗓️ Help me plan my week",
         )
-
-        if st.button("🗓️ Help me plan my week", key="time_ai_button") and msg.strip():
-            # Use the safe AI wrapper to plan your schedule with caching and rate limiting
-            with st.spinner("Planning around your schedule..."):
-                reply = safe_ai(self.id, msg, session)
-            st.session_state.setdefault("ai_responses", {})[self.id] = reply
-
-        if st.session_state.get("ai_responses", {}).get(self.id):
-            st.markdown("###### AI suggestion")
-            st.markdown(st.session_state["ai_responses"][self.id])
-
-        # ---------- Auto-refresh while timer is running ----------
-        if st.session_state["timer_running"]:
-            # Simple 1-second loop so the display updates live
-            time.sleep(1)
-            try:
-                st.rerun()
-            except AttributeError:
-                st.experimental_rerun()
-
@@ -10,7 +10,6 @@ modules as selectable buttons.
 from __future__ import annotations
 
 import os
-import time
 from typing import Optional
 
 import streamlit as st
@@ -20,26 +19,14 @@ from state import (
     create_new_session,
     delete_session,
     format_time_display,
+    pause_timer,
+    reset_timer,
 )
+from steps import STEPS
 
 
-def inject_custom_css() -> None:
-    """Inject custom CSS into the Streamlit app.
-
-    If a file named ``mockup.css`` exists in the project root, its
-    contents will be injected. Otherwise a minimal fallback style is
-    applied to approximate the design from the provided HTML mockup.
-    """
-
-    # Try to load an external mockup.css if it exists
-    css_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "mockup.css")
-    if os.path.exists(css_path):
-        with open(css_path, "r", encoding="utf-8") as f:
-            css = f.read()
-  
-    else:
-        # Fallback style based on the mockup
-        css = """
+# Fallback style based on the mockup, used when ``mockup.css`` is absent
+_FALLBACK_CSS = """
         :root {
             --color-primary: #f59127;
             --color-primary-dark: #8ea9f0;
@@ -165,8 +152,8 @@ label, .stTextInput label, .stTextArea label {
 }  
         """
 
-    # Extra CSS that should always apply (even if mockup.css is loaded)
-    css += """
+# Extra CSS that should always apply (even if mockup.css is loaded)
+_EXTRA_CSS = """
     /* Keep our custom header below the toolbar area */
     .app-header {
         margin: 0 0 1rem 0 !important;
@@ -222,7 +209,35 @@ label, .stTextInput label, .stTextArea label {
     }
     """
 
-    st.markdown(f"<style>{css}</style>", unsafe_allow_html=True)
+@st.cache_resource(show_spinner=False)
+def _load_css() -> str:
+    """Return the full ``<style>`` block for the app.
+
+    Uses ``mockup.css`` from the project root when present, otherwise the
+    built-in fallback; ``_EXTRA_CSS`` is always appended. The stylesheet
+    is static, so it is read from disk once per server process rather
+    than on every rerun.
+    """
+    css_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "mockup.css")
+    try:
+        with open(css_path, "r", encoding="utf-8") as f:
+            css = f.read()
+    except FileNotFoundError:
+        css = _FALLBACK_CSS
+    return f"<style>{css}{_EXTRA_CSS}</style>"
+
+
+def inject_custom_css() -> None:
+    """Inject custom CSS into the Streamlit app.
+
+    If a file named ``mockup.css`` exists in the project root, its
+    contents will be injected. Otherwise a minimal fallback style is
+    applied to approximate the design from the provided HTML mockup.
+
+    ``st.html`` hands the ``<style>`` block straight to the page without a
+    markdown pass, and a style-only block takes up no layout space.
+    """
+    st.html(_load_css())
 
 
 def render_header(session: dict) -> None:
@@ -252,15 +267,6 @@ def render_header(session: dict) -> None:
         )
 
 
-def _safe_rerun() -> None:
-    """Safely trigger a rerun without crashing if not supported."""
-    try:
-        st.experimental_rerun()
-    except Exception:
-        # Older/newer Streamlit versions may not support experimental_rerun
-        pass
-
-
 def render_session_toolbar() -> None:
     """Render the toolbar with actions to save, create, and manage sessions."""
 
@@ -275,53 +281,111 @@ def render_session_toolbar() -> None:
 
     with col2:
         if st.button("➕ New session", use_container_width=True):
+            # The clock ticks in the browser, so fold the running stretch
+            # into the outgoing session before it stops being current
+            pause_timer()
             create_new_session(default_demo=False)
 
             # Clear cached AI responses when starting a new session
-            st.session_state.get("ai_responses", {}).clear()
-            st.session_state["timer_running"] = False
-            st.session_state["timer_total_seconds"] = 0
-            st.session_state["timer_last_tick"] = time.time()
+            st.session_state["ai_responses"].clear()
+            reset_timer()
             st.toast("New session created 🌱")
 
     with col3:
         with st.expander("📂 Sessions", expanded=False):
-            sessions = st.session_state.get("sessions", {})
-            if not sessions:
-                st.caption("No saved sessions yet.")
-            else:
-                current_sid = st.session_state.get("current_session_id")
-                sorted_items = sorted(
-                    sessions.items(),
-                    key=lambda item: item[1].get("updated_at", 0),
-                    reverse=True,
-                )
-                for sid, sess in sorted_items:
-                    label = sess.get("task_name") or sess.get("name") or "Untitled"
-                    is_current = sid == current_sid
-
-                    cols = st.columns([4, 1, 1])
-                    cols[0].markdown(
-                        f"**{label}**" + ("  ✅" if is_current else "")
-                    )
-
-                    if cols[1].button("Load", key=f"load_{sid}"):
-                        st.session_state["current_session_id"] = sid
-                        minutes = float(sess.get("total_time_minutes", 0) or 0)
-                        st.session_state["timer_running"] = False
-                        st.session_state["timer_total_seconds"] = int(minutes * 60)
-                        st.session_state["timer_last_tick"] = time.time()
-                        _safe_rerun()
-
-                    if cols[2].button("🗑️", key=f"delete_{sid}"):
-                        delete_session(sid)
-                        _safe_rerun()
+            _render_session_list()
 
     st.markdown("</div>", unsafe_allow_html=True)
 
 
-from typing import Optional
-import streamlit as st
+# Number of saved sessions listed per page in the Sessions panel
+SESSIONS_PER_PAGE = 10
+
+
+def _session_label(sess: dict) -> str:
+    """Return the display name for a saved session."""
+    return sess.get("task_name") or sess.get("name") or "Untitled"
+
+
+@st.fragment
+def _render_session_list() -> None:
+    """Render saved sessions with Load/Delete buttons.
+
+    This runs as a fragment: clicks inside it rerun only the list unless
+    the current session changes, in which case the whole app is rerun so
+    the header and active step pick up the new session.
+    """
+    sessions = st.session_state.get("sessions", {})
+    if not sessions:
+        st.caption("No saved sessions yet.")
+        return
+
+    query = st.text_input(
+        "Search sessions",
+        key="sessions_search",
+        placeholder="Search by task name",
+        label_visibility="collapsed",
+    ).strip().lower()
+
+    current_sid = st.session_state.get("current_session_id")
+    # Already ordered most recently updated first; see state.session_order
+    order = st.session_state["session_order"]
+    if query:
+        order = [sid for sid in order if query in _session_label(sessions[sid]).lower()]
+    if not order:
+        st.caption("No sessions match your search.")
+        return
+
+    # Only one page of rows (and their buttons) is built per run
+    page_count = -(-len(order) // SESSIONS_PER_PAGE)
+    page = min(st.session_state.get("sessions_page", 0), page_count - 1)
+    if page_count > 1:
+        nav = st.columns([1, 2, 1])
+        if nav[0].button("◀", key="sessions_prev", disabled=page == 0):
+            page -= 1
+        if nav[2].button("▶", key="sessions_next", disabled=page >= page_count - 1):
+            page += 1
+        page = max(0, min(page, page_count - 1))
+        nav[1].caption(f"Page {page + 1} of {page_count}")
+    st.session_state["sessions_page"] = page
+
+    start = page * SESSIONS_PER_PAGE
+    for sid in order[start:start + SESSIONS_PER_PAGE]:
+        sess = sessions[sid]
+        label = _session_label(sess)
+        is_current = sid == current_sid
+
+        cols = st.columns([4, 1, 1])
+        cols[0].markdown(
+            f"**{label}**" + ("  ✅" if is_current else "")
+        )
+
+        if cols[1].button("Load", key=f"load_{sid}"):
+            # Credit time since the last rerun to the session being left
+            pause_timer()
+            st.session_state["current_session_id"] = sid
+            reset_timer(float(sess.get("total_time_minutes", 0) or 0))
+            st.rerun()
+
+        if cols[2].button("🗑️", key=f"delete_{sid}"):
+            delete_session(sid)
+            # Removing another session only changes this list
+            st.rerun(scope="app" if is_current else "fragment")
+
+
+# The step list is fixed at import time, so build each module button's
+# key, plain and bold (active) labels, and caption once instead of on
+# every rerun.
+_MODULE_BUTTONS = [
+    (
+        step.id,
+        f"module_{step.id}",
+        f"{step.emoji}  {step.label}",
+        f"**{step.emoji}  {step.label}**",
+        step.description,
+    )
+    for step in STEPS
+]
 
 
 def render_module_selector(active_step: Optional[str]) -> str:
@@ -337,25 +401,20 @@ def render_module_selector(active_step: Optional[str]) -> str:
     Returns:
         The ID of the module selected by the user.
     """
-    # Import steps lazily to avoid circular imports at module load time
-    from steps import STEPS
-
     # Wrap all module buttons in a container so we can style them via CSS
     st.markdown('<div class="module-list">', unsafe_allow_html=True)
 
-    selected_id = active_step or (STEPS[0].id if STEPS else None)
-    for step in STEPS:
-        is_active = step.id == selected_id
-        label = f"{step.emoji}  {step.label}"
-        button_label = f"**{label}**" if is_active else label
+    selected_id = active_step or (_MODULE_BUTTONS[0][0] if _MODULE_BUTTONS else None)
+    for step_id, key, label, active_label, description in _MODULE_BUTTONS:
+        is_active = step_id == selected_id
         if st.button(
-            button_label,
-            key=f"module_{step.id}",
+            active_label if is_active else label,
+            key=key,
             use_container_width=True,
         ):
-            selected_id = step.id
+            selected_id = step_id
         if is_active:
-            st.caption(step.description)
+            st.caption(description)
 
     st.markdown("</div>", unsafe_allow_html=True)
 